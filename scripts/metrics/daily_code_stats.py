@@ -14,6 +14,9 @@
 - GITLAB_TOKEN: GitLab API Token (需要 read_api 权限)
 - GITLAB_GROUP: 统计的 Group 名称 (必填)
 - PROJECT_PREFIXES: 项目前缀过滤，逗号分隔 (可选，如 "app-,service-")
+- GITLAB_CONCURRENCY: 并发请求 GitLab 的线程数 (可选，默认 8)
+- PROJECTS_CACHE_TTL: 项目列表本地缓存秒数 (可选，默认 86400，0 表示不缓存)
+- SKIP_PATH_PATTERNS: 不统计的 Java 目录，逗号分隔 (可选，默认 "src/test/,generated/")
 - WECOM_WEBHOOK: 企业微信机器人 Webhook (可选)
 - DINGTALK_WEBHOOK: 钉钉机器人 Webhook (可选)
 - TELEGRAM_BOT_TOKEN: Telegram Bot Token (可选)
@@ -24,11 +27,18 @@
 import json
 import os
 import re
+import sys
+import threading
+import time
 import requests
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from operator import itemgetter
 from typing import Dict, List, Tuple, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ============================================================
 # 配置
@@ -40,6 +50,15 @@ GITLAB_GROUP = os.getenv("GITLAB_GROUP", "")  # 必填: GitLab Group 名称
 # 项目前缀过滤，逗号分隔，如 "app-,service-"，为空则不过滤
 _prefix_env = os.getenv("PROJECT_PREFIXES", "")
 PROJECT_PREFIXES = tuple(p.strip() for p in _prefix_env.split(",") if p.strip()) if _prefix_env else ()
+# 并发请求 GitLab 的线程数 (diff 拉取与分页共用此上限)
+GITLAB_CONCURRENCY = int(os.getenv("GITLAB_CONCURRENCY", "8"))
+# 项目列表变化很少，缓存到本地文件，过期时间 (秒)
+PROJECTS_CACHE_TTL = int(os.getenv("PROJECTS_CACHE_TTL", "86400"))
+PROJECTS_CACHE_FILE = os.path.expanduser("~/.cache/daily_code_stats/projects.json")
+# 以下目录中的 Java 文件不计入有效代码 (测试代码、生成代码)
+# 匹配路径开头或完整的目录段，如 "generated/" 匹配 generated/A.java 和 app/generated/A.java
+_skip_path_env = os.getenv("SKIP_PATH_PATTERNS", "src/test/,generated/")
+SKIP_PATH_PATTERNS = tuple(p.strip() for p in _skip_path_env.split(",") if p.strip())
 
 # 高级工程师产出标准 (每日)
 SENIOR_ENGINEER_STANDARDS = {
@@ -48,23 +67,33 @@ SENIOR_ENGINEER_STANDARDS = {
     "effective_ratio": 0.6,         # 有效代码占比阈值
 }
 
-# 有效代码过滤规则
+# 有效代码过滤规则 (is_effective_line 按首字符分派实现，此处为规则说明)
+# 按 Java diff 中的出现频率排序，与 is_effective_line 的判断顺序一致
 EXCLUDE_PATTERNS = [
     r"^\s*$",                       # 空行
-    r"^\s*//",                      # 单行注释
-    r"^\s*/\*",                     # 多行注释开始
+    r"^\s*\}\s*$",                  # 单独的 }
     r"^\s*\*",                      # 多行注释中间
     r"^\s*\*/",                     # 多行注释结束
-    r"^\s*import\s+",               # import 语句
-    r"^\s*package\s+",              # package 语句
+    r"^\s*//",                      # 单行注释
+    r"^\s*/\*",                     # 多行注释开始
     r"^\s*@\w+\s*$",                # 单独一行的注解
-    r"^\s*@\w+\([^)]*\)\s*$",       # 带参数的注解
-    r"^\s*\}\s*$",                  # 单独的 }
+    r"^\s*@\w+\([^)]{0,512}\)\s*$",  # 带参数的注解 (参数最长 512 字符)
+    r"^\s*import\s+",               # import 语句
     r"^\s*\{\s*$",                  # 单独的 {
     r"^\s*\);?\s*$",                # 单独的 ) 或 );
+    r"^\s*package\s+",              # package 语句
     r"^\s*private\s+static\s+final\s+long\s+serialVersionUID",  # 序列化 ID
 ]
 
+# 无法通过简单字符串判断的规则
+# 注解参数长度设上限，避免超长生成代码行上的回溯开销
+_ANNOTATION_RE = re.compile(r"\A@\w+(?:\([^)\n]{0,512}\))?\Z")
+_SERIAL_VERSION_RE = re.compile(r"private\s+static\s+final\s+long\s+serialVersionUID")
+
+# diff 中的非空新增行 (排除 +++ 文件头)，分组为去掉 + 前缀和行首空白后的内容
+# 空行与缩进在正则引擎内直接跳过，不进入 is_effective_line
+_PLUS_LINE_RE = re.compile(r"(?m)^\+(?!\+\+)[^\S\n]*(\S[^\n]*)$")
+
 
 # ============================================================
 # 数据结构
@@ -91,17 +120,23 @@ class DeveloperStats:
     total_deletions: int = 0
     effective_additions: int = 0
     files_changed: int = 0
-    projects: set = field(default_factory=set)
+    skipped_additions: int = 0      # 按 SKIP_PATH_PATTERNS 跳过的文件中的新增行，不计入有效率分母
+    projects: Dict[str, None] = field(default_factory=dict)  # 按首次出现顺序去重
 
     @property
     def commit_count(self) -> int:
         return len(self.commits)
 
+    @property
+    def counted_additions(self) -> int:
+        """参与有效率计算的新增行数"""
+        return self.total_additions - self.skipped_additions
+
     @property
     def effective_ratio(self) -> float:
-        if self.total_additions == 0:
+        if self.counted_additions <= 0:
             return 0.0
-        return self.effective_additions / self.total_additions
+        return self.effective_additions / self.counted_additions
 
     @property
     def meets_standard(self) -> Tuple[bool, List[str]]:
@@ -115,12 +150,22 @@ class DeveloperStats:
         if self.commit_count < standards["min_commits"]:
             issues.append(f"提交次数 {self.commit_count} 次 < {standards['min_commits']} 次")
 
-        if self.effective_ratio < standards["effective_ratio"] and self.total_additions > 50:
+        if self.effective_ratio < standards["effective_ratio"] and self.counted_additions > 50:
             issues.append(f"有效代码占比 {self.effective_ratio:.0%} < {standards['effective_ratio']:.0%}")
 
         return len(issues) == 0, issues
 
 
+@dataclass
+class ReportSummary:
+    """报告汇总数据，供各格式报告共用"""
+    rows: List[Tuple[DeveloperStats, bool, List[str]]]   # (开发者, 是否达标, 待改进项)，按有效代码降序
+    developers: int = 0
+    qualified: int = 0
+    total_commits: int = 0
+    total_effective: int = 0
+
+
 # ============================================================
 # GitLab API
 # ============================================================
@@ -132,50 +177,149 @@ class GitLabClient:
         self.url = url.rstrip("/")
         self.headers = {"PRIVATE-TOKEN": token}
 
-    def _get(self, endpoint: str, params: dict = None) -> dict | list:
-        """发送 GET 请求"""
+        # diff 线程池与分页线程池共用同一个限流闸门，
+        # 同时在途的请求数不超过 GITLAB_CONCURRENCY，避免触发 GitLab 限流
+        self._slots = threading.BoundedSemaphore(GITLAB_CONCURRENCY)
+
+        # 复用 keep-alive 连接，避免每个请求都重新 TCP/TLS 握手
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max(32, GITLAB_CONCURRENCY),
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, endpoint: str, params: dict = None) -> requests.Response:
+        """发送 GET 请求，返回原始响应"""
         url = f"{self.url}/api/v4{endpoint}"
-        resp = requests.get(url, headers=self.headers, params=params, timeout=30)
+        with self._slots:
+            resp = self.session.get(url, params=params, timeout=30)
         resp.raise_for_status()
-        return resp.json()
+        return resp
+
+    def _get(self, endpoint: str, params: dict = None) -> dict | list:
+        """发送 GET 请求"""
+        return self._request(endpoint, params).json()
 
     def _get_all(self, endpoint: str, params: dict = None) -> list:
-        """分页获取所有数据"""
-        params = params or {}
-        params["per_page"] = 100
-        page = 1
-        results = []
+        """分页获取所有数据
 
-        while True:
-            params["page"] = page
-            data = self._get(endpoint, params)
-            if not data:
-                break
-            results.extend(data)
-            if len(data) < 100:
-                break
-            page += 1
+        首页返回 x-total-pages 时并发拉取其余页；
+        记录数超过 10000 时 GitLab 不返回该值，改为按 x-next-page 顺序翻页。
+        """
+        params = dict(params or {})
+        params["per_page"] = 100
+        params["page"] = 1
+        resp = self._request(endpoint, params)
+        results = resp.json()
+
+        total_pages = int(resp.headers.get("x-total-pages") or 0)
+        if total_pages > 1:
+            pages = [{**params, "page": page} for page in range(2, total_pages + 1)]
+            with ThreadPoolExecutor(max_workers=GITLAB_CONCURRENCY) as executor:
+                # map 按提交顺序返回，保持分页顺序
+                for data in executor.map(lambda p: self._get(endpoint, p), pages):
+                    results.extend(data)
+            return results
+
+        while resp.headers.get("x-next-page"):
+            params["page"] = int(resp.headers["x-next-page"])
+            resp = self._request(endpoint, params)
+            results.extend(resp.json())
 
         return results
 
+    @staticmethod
+    def _filter_prefixes(projects: List[dict]) -> List[dict]:
+        """按前缀过滤项目（如果设置了前缀）"""
+        if PROJECT_PREFIXES:
+            return [p for p in projects if p["name"].startswith(PROJECT_PREFIXES)]
+        return projects
+
     def get_group_projects(self, group: str) -> List[dict]:
         """获取 Group 下所有项目"""
         projects = self._get_all(f"/groups/{group}/projects", {"include_subgroups": "true"})
-        # 按前缀过滤项目（如果设置了前缀）
-        if PROJECT_PREFIXES:
-            return [p for p in projects if p["name"].startswith(PROJECT_PREFIXES)]
+        return self._filter_prefixes(projects)
+
+    def get_group_projects_created_since(self, group: str, since_ts: float) -> List[dict]:
+        """获取 Group 下 since_ts 之后创建的项目 (按创建时间倒序翻页，遇到更早的项目即停止)"""
+        params = {
+            "include_subgroups": "true",
+            "order_by": "created_at",
+            "sort": "desc",
+            "per_page": 100,
+            "page": 1,
+        }
+        projects = []
+        while True:
+            resp = self._request(f"/groups/{group}/projects", params)
+            for project in resp.json():
+                created_at = datetime.fromisoformat(project["created_at"].replace("Z", "+00:00"))
+                if created_at.timestamp() < since_ts:
+                    return self._filter_prefixes(projects)
+                projects.append(project)
+            if not resp.headers.get("x-next-page"):
+                return self._filter_prefixes(projects)
+            params["page"] = int(resp.headers["x-next-page"])
+
+    def get_group_projects_cached(self, group: str, ttl: int = PROJECTS_CACHE_TTL) -> List[dict]:
+        """获取 Group 下所有项目，完整列表缓存 ttl 秒
+
+        命中缓存时仍会查询缓存写入之后新建的项目并合并进来，
+        保证统计当天新建的项目不会因缓存而漏掉。
+        """
+        cache_key = [self.url, group, list(PROJECT_PREFIXES)]
+        cached = None
+        if ttl > 0:
+            try:
+                with open(PROJECTS_CACHE_FILE, encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached["key"] != cache_key or time.time() - cached["fetched_at"] >= ttl:
+                    cached = None
+            except (OSError, ValueError, KeyError, TypeError):
+                cached = None
+
+        if cached is not None:
+            projects = cached["projects"]
+            known_ids = {p["id"] for p in projects}
+            # 回退 1 小时，容忍本机与 GitLab 的时钟偏差，重复的项目按 id 去重
+            recent = self.get_group_projects_created_since(group, cached["fetched_at"] - 3600)
+            return projects + [p for p in recent if p["id"] not in known_ids]
+
+        # 在拉取前记录时间，拉取过程中新建的项目下次会被当作新项目合并
+        fetched_at = time.time()
+        projects = self.get_group_projects(group)
+        if ttl > 0:
+            try:
+                os.makedirs(os.path.dirname(PROJECTS_CACHE_FILE), exist_ok=True)
+                tmp_file = f"{PROJECTS_CACHE_FILE}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump({"key": cache_key, "fetched_at": fetched_at, "projects": projects}, f)
+                os.replace(tmp_file, PROJECTS_CACHE_FILE)
+            except OSError as e:
+                print(f"Warning: Failed to write projects cache: {e}")
         return projects
 
     def get_project_commits(self, project_id: int, since: str, until: str) -> List[dict]:
-        """获取项目在指定时间段的提交"""
-        return self._get_all(f"/projects/{project_id}/repository/commits", {
+        """获取项目在指定时间段的提交 (不含合并提交)"""
+        commits = self._get_all(f"/projects/{project_id}/repository/commits", {
             "since": since,
             "until": until,
             "with_stats": "true",
         })
+        # 合并提交的 stats 包含整个分支的改动，与分支上的原始提交重复计数
+        return [c for c in commits if len(c.get("parent_ids") or ()) <= 1]
 
     def get_commit_diff(self, project_id: int, sha: str) -> List[dict]:
-        """获取提交的 diff 详情"""
+        """获取提交的 diff 详情
+
+        GraphQL 的 Repository 不支持按时间范围列出提交，Commit.diffs 单次请求
+        也有数量上限，无法合并为按项目的批量查询，因此仍按提交调用 REST 接口
+        (由 collect_stats 并发执行)。
+        """
         return self._get(f"/projects/{project_id}/repository/commits/{sha}/diff")
 
 
@@ -184,37 +328,83 @@ class GitLabClient:
 # ============================================================
 
 def is_effective_line(line: str) -> bool:
-    """判断是否为有效代码行"""
-    for pattern in EXCLUDE_PATTERNS:
-        if re.match(pattern, line):
-            return False
-    return True
+    """判断是否为有效代码行
+
+    绝大多数代码行通过首字符即可判定，只有注解和 serialVersionUID 才需要正则。
+    """
+    s = line.lstrip()
+    if not s:
+        return False                                # 空行
+    first = s[0]
+    # 普通代码行的首字符不在任何排除规则中，直接返回
+    if first not in "}*/@i{)p":
+        return True
+    # 其余按出现频率从高到低判断
+    if first == "}":
+        return s.rstrip() != "}"                    # 单独的 }
+    if first == "*":
+        return False                                # 多行注释中间/结束
+    if first == "/":
+        return not s.startswith(("//", "/*"))       # 注释
+    if first == "@":
+        return _ANNOTATION_RE.match(s.rstrip()) is None
+    if first == "i":
+        return not (s.startswith("import") and s[6:7].isspace())
+    if first == "{":
+        return s.rstrip() != "{"                    # 单独的 {
+    if first == ")":
+        return s.rstrip() not in (")", ");")        # 单独的 ) 或 );
+    # 以 p 开头
+    if s.startswith("package") and s[7:8].isspace():
+        return False
+    return "serialVersionUID" not in s or _SERIAL_VERSION_RE.match(s) is None
+
+
+def count_added_lines(diff_content: str) -> int:
+    """统计 diff 中的全部新增行数 (含空行、注释，与 GitLab stats.additions 口径一致)"""
+    return diff_content.count("\n+") + diff_content.startswith("+")
+
+
+def is_skipped_path(path: str) -> bool:
+    """判断文件是否位于 SKIP_PATH_PATTERNS 指定的目录中"""
+    return any(path.startswith(p) or f"/{p}" in path for p in SKIP_PATH_PATTERNS)
 
 
 def count_effective_lines(diff_content: str) -> int:
     """统计 diff 中的有效新增行数"""
-    effective = 0
-    for line in diff_content.split("\n"):
-        if line.startswith("+") and not line.startswith("+++"):
-            actual_line = line[1:]  # 去掉 + 前缀
-            if is_effective_line(actual_line):
-                effective += 1
-    return effective
+    # 纯删除/重命名的文件没有新增行，先用子串查找整体判断，跳过逐行扫描
+    if "\n+" not in diff_content and not diff_content.startswith("+"):
+        return 0
+    # 逐个匹配新增行，不构造整个 diff 的行列表；循环由 sum/map 在 C 层驱动
+    added_lines = map(itemgetter(1), _PLUS_LINE_RE.finditer(diff_content))
+    return sum(map(is_effective_line, added_lines))
+
 
+def needs_diff_analysis(commit: dict) -> bool:
+    """判断提交是否需要拉取 diff 统计有效代码 (没有新增行的提交不可能有有效代码)"""
+    return commit.get("stats", {}).get("additions", 0) > 0
 
-def analyze_commit_diff(client: GitLabClient, project_id: int, sha: str) -> int:
-    """分析单次提交的有效代码行数"""
+
+def analyze_commit_diff(client: GitLabClient, project_id: int, sha: str) -> Tuple[int, int]:
+    """分析单次提交，返回 (有效代码行数, 跳过文件的新增行数)"""
     try:
         diffs = client.get_commit_diff(project_id, sha)
         effective = 0
+        skipped = 0
         for diff in diffs:
             # 只统计 Java 文件
-            if diff.get("new_path", "").endswith(".java"):
-                effective += count_effective_lines(diff.get("diff", ""))
-        return effective
+            path = diff.get("new_path") or ""
+            if not path.endswith(".java"):
+                continue
+            # 测试/生成代码不计入有效代码，其新增行也从有效率分母中扣除
+            if is_skipped_path(path):
+                skipped += count_added_lines(diff.get("diff", ""))
+                continue
+            effective += count_effective_lines(diff.get("diff", ""))
+        return effective, skipped
     except Exception as e:
         print(f"Warning: Failed to analyze commit {sha}: {e}")
-        return 0
+        return 0, 0
 
 
 # ============================================================
@@ -232,30 +422,46 @@ def collect_stats(client: GitLabClient, date: datetime) -> Dict[str, DeveloperSt
     developers: Dict[str, DeveloperStats] = {}
 
     # 获取所有 项目
-    projects = client.get_group_projects(GITLAB_GROUP)
+    projects = client.get_group_projects_cached(GITLAB_GROUP)
     print(f"发现 {len(projects)} 个 项目")
 
-    for project in projects:
-        project_id = project["id"]
-        project_name = project["name"]
-        print(f"  分析项目: {project_name}")
-
-        commits = client.get_project_commits(project_id, since, until)
-        print(f"    发现 {len(commits)} 个提交")
-
-        for commit in commits:
-            author_email = commit.get("author_email", "unknown")
+    # diff 拉取是互相独立的网络请求，提交到线程池并发执行
+    # 结果按提交顺序在主线程汇总，developers 无需加锁
+    with ThreadPoolExecutor(max_workers=GITLAB_CONCURRENCY) as executor:
+        pending = []
+        # 同一 SHA 的 diff 内容相同，fork/镜像项目中重复出现的提交复用同一个任务
+        submitted: Dict[str, Future] = {}
+        for project in projects:
+            project_id = project["id"]
+            project_name = project["name"]
+            print(f"  分析项目: {project_name}")
+
+            commits = client.get_project_commits(project_id, since, until)
+            print(f"    发现 {len(commits)} 个提交")
+
+            for commit in commits:
+                future = None
+                if needs_diff_analysis(commit):
+                    future = submitted.get(commit["id"])
+                    if future is None:
+                        future = executor.submit(analyze_commit_diff, client, project_id, commit["id"])
+                        submitted[commit["id"]] = future
+                pending.append((project_name, commit, future))
+
+        for project_name, commit, future in pending:
+            # 同一开发者的邮箱在多个项目的提交中反复出现，intern 后共用同一个 key
+            author_email = sys.intern(commit.get("author_email") or "unknown")
             author_name = commit.get("author_name", "Unknown")
 
             # 初始化开发者统计
-            if author_email not in developers:
-                developers[author_email] = DeveloperStats(
+            dev = developers.get(author_email)
+            if dev is None:
+                dev = developers[author_email] = DeveloperStats(
                     name=author_name,
                     email=author_email
                 )
 
-            dev = developers[author_email]
-            dev.projects.add(project_name)
+            dev.projects[project_name] = None
 
             # 提交统计
             stats = commit.get("stats", {})
@@ -263,7 +469,7 @@ def collect_stats(client: GitLabClient, date: datetime) -> Dict[str, DeveloperSt
             deletions = stats.get("deletions", 0)
 
             # 分析有效代码
-            effective = analyze_commit_diff(client, project_id, commit["id"])
+            effective, skipped = future.result() if future else (0, 0)
 
             commit_stats = CommitStats(
                 sha=commit["id"][:8],
@@ -277,6 +483,7 @@ def collect_stats(client: GitLabClient, date: datetime) -> Dict[str, DeveloperSt
             dev.total_additions += additions
             dev.total_deletions += deletions
             dev.effective_additions += effective
+            dev.skipped_additions += skipped
 
     return developers
 
@@ -285,7 +492,35 @@ def collect_stats(client: GitLabClient, date: datetime) -> Dict[str, DeveloperSt
 # 报告生成
 # ============================================================
 
-def generate_report(stats: Dict[str, DeveloperStats], date: datetime) -> str:
+# 文本报告中单个开发者的概要 (开头的换行与上一位开发者隔开)
+DEV_BLOCK_TEMPLATE = (
+    "\n"
+    "{status} {name} <{email}>\n"
+    "   项目: {projects}\n"
+    "   提交: {commit_count} 次\n"
+    "   新增: {additions} 行 (有效 {effective} 行, {ratio:.0%})\n"
+    "   删除: {deletions} 行"
+)
+
+# Markdown 报告中单个开发者的表格行
+MD_ROW_TEMPLATE = "| {status} | {name} | {commit_count} | {additions} | {effective} | {ratio:.0%} | {projects} |"
+
+
+def summarize_stats(stats: Dict[str, DeveloperStats]) -> ReportSummary:
+    """排序开发者并计算达标情况与汇总数据 (每位开发者只评估一次)"""
+    # 按有效代码行数排序
+    sorted_devs = sorted(stats.values(), key=lambda d: d.effective_additions, reverse=True)
+    rows = [(dev, *dev.meets_standard) for dev in sorted_devs]
+    return ReportSummary(
+        rows=rows,
+        developers=len(rows),
+        qualified=sum(1 for _, meets, _ in rows if meets),
+        total_commits=sum(dev.commit_count for dev in sorted_devs),
+        total_effective=sum(dev.effective_additions for dev in sorted_devs),
+    )
+
+
+def generate_report(summary: ReportSummary, date: datetime) -> str:
     """生成文本报告"""
     lines = [
         "=" * 60,
@@ -298,21 +533,20 @@ def generate_report(stats: Dict[str, DeveloperStats], date: datetime) -> str:
         "-" * 60,
     ]
 
-    # 按有效代码行数排序
-    sorted_devs = sorted(stats.values(), key=lambda d: d.effective_additions, reverse=True)
-
-    for dev in sorted_devs:
-        meets, issues = dev.meets_standard
+    for dev, meets, issues in summary.rows:
         status = "✅" if meets else "⚠️"
 
-        lines.extend([
-            "",
-            f"{status} {dev.name} <{dev.email}>",
-            f"   项目: {', '.join(dev.projects)}",
-            f"   提交: {dev.commit_count} 次",
-            f"   新增: {dev.total_additions} 行 (有效 {dev.effective_additions} 行, {dev.effective_ratio:.0%})",
-            f"   删除: {dev.total_deletions} 行",
-        ])
+        lines.append(DEV_BLOCK_TEMPLATE.format(
+            status=status,
+            name=dev.name,
+            email=dev.email,
+            projects=", ".join(dev.projects),
+            commit_count=dev.commit_count,
+            additions=dev.total_additions,
+            effective=dev.effective_additions,
+            ratio=dev.effective_ratio,
+            deletions=dev.total_deletions,
+        ))
 
         if issues:
             lines.append(f"   待改进: {'; '.join(issues)}")
@@ -326,25 +560,23 @@ def generate_report(stats: Dict[str, DeveloperStats], date: datetime) -> str:
                 lines.append(f"     ... 还有 {len(dev.commits) - 5} 条提交")
 
     # 汇总统计
-    total_effective = sum(d.effective_additions for d in stats.values())
-    total_commits = sum(d.commit_count for d in stats.values())
-    qualified = sum(1 for d in stats.values() if d.meets_standard[0])
+    developers, qualified = summary.developers, summary.qualified
 
     lines.extend([
         "",
         "-" * 60,
         "汇总:",
-        f"  开发者: {len(stats)} 人",
-        f"  达标: {qualified}/{len(stats)} ({qualified/len(stats)*100:.0f}%)" if stats else "  达标: 0/0",
-        f"  总提交: {total_commits} 次",
-        f"  总有效代码: {total_effective} 行",
+        f"  开发者: {developers} 人",
+        f"  达标: {qualified}/{developers} ({qualified/developers*100:.0f}%)" if developers else "  达标: 0/0",
+        f"  总提交: {summary.total_commits} 次",
+        f"  总有效代码: {summary.total_effective} 行",
         "=" * 60,
     ])
 
     return "\n".join(lines)
 
 
-def generate_markdown_report(stats: Dict[str, DeveloperStats], date: datetime) -> str:
+def generate_markdown_report(summary: ReportSummary, date: datetime) -> str:
     """生成 Markdown 格式报告"""
     lines = [
         f"# 代码产出日报 - {date.strftime('%Y-%m-%d')}",
@@ -358,34 +590,33 @@ def generate_markdown_report(stats: Dict[str, DeveloperStats], date: datetime) -
         "|------|--------|------|--------|--------|--------|------|",
     ]
 
-    sorted_devs = sorted(stats.values(), key=lambda d: d.effective_additions, reverse=True)
-
-    for dev in sorted_devs:
-        meets, _ = dev.meets_standard
+    for dev, meets, _ in summary.rows:
         status = "✅" if meets else "⚠️"
         projects = ", ".join(list(dev.projects)[:3])
         if len(dev.projects) > 3:
             projects += f" +{len(dev.projects) - 3}"
 
-        lines.append(
-            f"| {status} | {dev.name} | {dev.commit_count} | "
-            f"{dev.total_additions} | {dev.effective_additions} | "
-            f"{dev.effective_ratio:.0%} | {projects} |"
-        )
+        lines.append(MD_ROW_TEMPLATE.format(
+            status=status,
+            name=dev.name,
+            commit_count=dev.commit_count,
+            additions=dev.total_additions,
+            effective=dev.effective_additions,
+            ratio=dev.effective_ratio,
+            projects=projects,
+        ))
 
     # 汇总
-    total_effective = sum(d.effective_additions for d in stats.values())
-    total_commits = sum(d.commit_count for d in stats.values())
-    qualified = sum(1 for d in stats.values() if d.meets_standard[0])
+    developers, qualified = summary.developers, summary.qualified
 
     lines.extend([
         "",
         "## 汇总",
         "",
-        f"- 开发者: **{len(stats)}** 人",
-        f"- 达标率: **{qualified}/{len(stats)}** ({qualified/len(stats)*100:.0f}%)" if stats else "- 达标率: 0/0",
-        f"- 总提交: **{total_commits}** 次",
-        f"- 总有效代码: **{total_effective}** 行",
+        f"- 开发者: **{developers}** 人",
+        f"- 达标率: **{qualified}/{developers}** ({qualified/developers*100:.0f}%)" if developers else "- 达标率: 0/0",
+        f"- 总提交: **{summary.total_commits}** 次",
+        f"- 总有效代码: **{summary.total_effective}** 行",
     ])
 
     return "\n".join(lines)
@@ -395,13 +626,17 @@ def generate_markdown_report(stats: Dict[str, DeveloperStats], date: datetime) -
 # 通知发送
 # ============================================================
 
+# 通知共用一个 Session，Telegram 分段发送时复用同一连接
+_NOTIFY_SESSION = requests.Session()
+
+
 def send_wecom(webhook: str, content: str):
     """发送企业微信通知"""
     data = {
         "msgtype": "markdown",
         "markdown": {"content": content}
     }
-    resp = requests.post(webhook, json=data, timeout=10)
+    resp = _NOTIFY_SESSION.post(webhook, json=data, timeout=10)
     print(f"企业微信发送结果: {resp.status_code}")
 
 
@@ -414,7 +649,7 @@ def send_dingtalk(webhook: str, content: str):
             "text": content
         }
     }
-    resp = requests.post(webhook, json=data, timeout=10)
+    resp = _NOTIFY_SESSION.post(webhook, json=data, timeout=10)
     print(f"钉钉发送结果: {resp.status_code}")
 
 
@@ -431,17 +666,18 @@ def send_telegram(bot_token: str, chat_id: str, content: str):
     if len(content) <= max_len:
         parts = [content]
     else:
-        # 按行分割，避免截断表格
-        lines = content.split("\n")
-        current = ""
-        for line in lines:
-            if len(current) + len(line) + 1 > max_len:
-                parts.append(current)
-                current = line
+        # 按行分割，避免截断表格；行先攒到列表里，满一段再 join
+        buf: List[str] = []
+        size = 0  # 等于 len("\n".join(buf))
+        for line in content.split("\n"):
+            if buf and size + len(line) + 1 > max_len:
+                parts.append("\n".join(buf))
+                buf, size = [line], len(line)
             else:
-                current = current + "\n" + line if current else line
-        if current:
-            parts.append(current)
+                size += len(line) + 1 if buf else len(line)
+                buf.append(line)
+        if buf:
+            parts.append("\n".join(buf))
 
     for i, part in enumerate(parts):
         data = {
@@ -450,7 +686,7 @@ def send_telegram(bot_token: str, chat_id: str, content: str):
             "parse_mode": "Markdown",
             "disable_web_page_preview": True
         }
-        resp = requests.post(url, json=data, timeout=10)
+        resp = _NOTIFY_SESSION.post(url, json=data, timeout=10)
         if resp.status_code == 200:
             print(f"Telegram 发送成功 ({i+1}/{len(parts)})")
         else:
@@ -489,8 +725,9 @@ def main():
             return 0
 
         # 生成报告
-        text_report = generate_report(stats, yesterday)
-        md_report = generate_markdown_report(stats, yesterday)
+        summary = summarize_stats(stats)
+        text_report = generate_report(summary, yesterday)
+        md_report = generate_markdown_report(summary, yesterday)
 
         # 输出到控制台
         print(text_report)
@@ -61,6 +61,15 @@ export GITLAB_GROUP="your-group-name"
 # 项目前缀过滤 (可选，逗号分隔，为空则统计所有项目)
 export PROJECT_PREFIXES=""
 
+# 并发请求 GitLab 的线程数 (可选，默认 8)
+# export GITLAB_CONCURRENCY="8"
+
+# 项目列表本地缓存秒数 (可选，默认 86400，0 表示不缓存)
+# export PROJECTS_CACHE_TTL="86400"
+
+# 不统计的 Java 目录 (可选，逗号分隔，匹配路径开头或目录段)
+# export SKIP_PATH_PATTERNS="src/test/,generated/"
+
 # Telegram 通知 (可选)
 export TELEGRAM_BOT_TOKEN="your-bot-token"
 export TELEGRAM_CHAT_ID="-1001234567890"